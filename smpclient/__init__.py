@@ -27,12 +27,14 @@ from __future__ import annotations
 
 import asyncio
 import logging
+from collections import deque
 from hashlib import sha256
 from types import TracebackType
-from typing import AsyncIterator, Final, Tuple, Type
+from typing import AsyncIterator, Deque, Dict, Final, Tuple, Type
 
 from pydantic import ValidationError
 from smp import header as smpheader
+from smp import image_management as smpimg
 from smp import message as smpmsg
 from typing_extensions import assert_never
 
@@ -50,6 +52,26 @@ except ImportError:  # backport for Python3.10 and below
 
 logger = logging.getLogger(__name__)
 
+_RESPONSE_TYPES: Final[Dict[type, Tuple[type, type, type]]] = {}
+"""Map of `SMPRequest` class to its `_Response`, `_ErrorV1`, and `_ErrorV2`."""
+
+
+def _response_types(
+    request: SMPRequest[TRep, TEr1, TEr2]
+) -> Tuple[Type[TRep], Type[TEr1], Type[TEr2]]:
+    """Return the `_Response`, `_ErrorV1`, and `_ErrorV2` of the `request`'s class.
+
+    The smp `Request` models are pydantic models that store `_Response` as a
+    private attribute, so reading it from an instance goes through
+    `BaseModel.__getattr__`.  Look the types up once per class instead.
+    """
+    try:
+        return _RESPONSE_TYPES[type(request)]  # type: ignore
+    except KeyError:
+        response_types: Final = (request._Response, request._ErrorV1, request._ErrorV2)
+        _RESPONSE_TYPES[type(request)] = response_types
+        return response_types
+
 
 class SMPClient:
     """Create a client to the SMP server `address`, using `transport`.
@@ -90,6 +112,7 @@ class SMPClient:
     def __init__(self, transport: SMPTransport, address: str):  # noqa: DOC301
         self._transport: Final = transport
         self._address: Final = address
+        self._smp_server_transport_buffer_count: int | None = None
 
     async def connect(self, timeout_s: float = 5.0) -> None:
         """Connect to the SMP server.
@@ -169,6 +192,28 @@ class SMPClient:
             logger.error(timeout_message)
             raise TimeoutError(timeout_message)
 
+        try:
+            return self._load_response(request, frame)
+        except (SMPBadSequence, ValidationError):  # raised by _load_response()
+            raise
+
+    def _load_response(
+        self, request: SMPRequest[TRep, TEr1, TEr2], frame: bytes
+    ) -> TRep | TEr1 | TEr2:
+        """Load the `frame` received in response to `request` as its Response or Error.
+
+        Args:
+            request: the `SMPRequest` that was sent
+            frame: the received SMP frame
+
+        Returns:
+            The typed and validated Response or Error
+
+        Raises:
+            SMPBadSequence: if the response sequence does not match the request sequence
+            ValidationError: if the response cannot be parsed as a Response or Error
+        """
+
         header = smpheader.Header.loads(frame[: smpheader.Header.SIZE])
 
         if header.sequence != request.header.sequence:
@@ -176,20 +221,22 @@ class SMPClient:
                 f"Bad sequence {header.sequence}, expected {request.header.sequence}"
             )
 
+        Response, ErrorV1, ErrorV2 = _response_types(request)
+
         try:
-            return request._Response.loads(frame)  # type: ignore
+            return Response.loads(frame)  # type: ignore
         except ValidationError:
             pass
         try:
-            return request._ErrorV1.loads(frame)
+            return ErrorV1.loads(frame)
         except ValidationError:
             pass
         try:
-            return request._ErrorV2.loads(frame)
+            return ErrorV2.loads(frame)
         except ValidationError:
             error_message = (
-                f"Response could not by parsed as one of {request._Response}, "
-                f"{request._ErrorV1}, or {request._ErrorV2}. {header=} {frame=}"
+                f"Response could not by parsed as one of {Response}, "
+                f"{ErrorV1}, or {ErrorV2}. {header=} {frame=}"
             )
             logger.error(error_message)
             raise ValidationError(error_message)
@@ -202,6 +249,7 @@ class SMPClient:
         first_timeout_s: float = 40.000,
         subsequent_timeout_s: float = 2.500,
         use_sha: bool = True,
+        pipeline: bool = False,
     ) -> AsyncIterator[int]:
         """Iteratively upload an `image` to `slot`, yielding the offset.
 
@@ -222,6 +270,14 @@ class SMPClient:
                 Zephyr's SMP server will fail with `MGMT_ERR.EINVAL` if the
                 MTU is too small to include both the SHA256 and the first 32-bytes
                 of the image.  Increase the MTU or set `use_sha=False` in this case.
+            pipeline: `True` to send as many as the SMP server's transport buffer
+                count of `ImageUploadWrite` requests before awaiting each
+                response, so that the SMP server can receive the next chunks
+                while it waits for flash writes to complete.  A transport with a
+                `max_requests_in_flight` attribute sets this number instead.  If the SMP server
+                reports an unexpected offset, the responses to the requests that
+                are in flight are discarded and the upload resumes from the
+                offset that the SMP server reported last.
 
         Yields:
             the offset of the image upload
@@ -254,38 +310,154 @@ class SMPClient:
         else:
             assert_never(response)  # pragma: no cover
 
-        # send chunks until the SMP server reports that the offset is at the end of the image
-        while response.off != len(image):
-            response = await self.request(
-                self._maximize_image_upload_write_packet(
-                    ImageUploadWrite(
-                        off=response.off,
-                        data=b"",
-                        len=len(image) if response.off == 0 else None,
-                        image=slot if response.off == 0 else None,
-                        upgrade=upgrade if response.off == 0 else None,
-                    ),
-                    image,
-                ),
-                timeout_s=subsequent_timeout_s,
+        max_requests_in_flight: Final = (
+            getattr(
+                self._transport,
+                "max_requests_in_flight",
+                self._smp_server_transport_buffer_count or 1,
             )
+            if pipeline
+            else 1
+        )
+        if max_requests_in_flight > 1:
+            async for off in self._pipelined_image_upload(
+                image, response, slot, upgrade, max_requests_in_flight, subsequent_timeout_s
+            ):
+                yield off
+        else:
+            # send chunks until the SMP server reports that the offset is at the end of the image
+            while response.off != len(image):
+                response = await self.request(
+                    self._maximize_image_upload_write_packet(
+                        ImageUploadWrite(
+                            off=response.off,
+                            data=b"",
+                            len=len(image) if response.off == 0 else None,
+                            image=slot if response.off == 0 else None,
+                            upgrade=upgrade if response.off == 0 else None,
+                        ),
+                        image,
+                    ),
+                    timeout_s=subsequent_timeout_s,
+                )
+                if error(response):
+                    raise SMPUploadError(response)
+                elif success(response):
+                    if response.off is None:
+                        raise SMPUploadError(f"No offset received: {response=}")
+                    yield response.off
+                else:
+                    assert_never(response)  # pragma: no cover
+
+            logger.info("Upload complete")
+            self._check_upload_match(response)
+
+    @staticmethod
+    def _check_upload_match(response: smpimg.ImageUploadWriteResponse) -> None:
+        """Raise `SMPUploadError` if the server reports that the image SHA256 did not match."""
+
+        if response.match is not None:
+            logger.info(f"Server reports {response.match=}")
+            if response.match is not True:
+                message: Final = f"Upload failed, server reported mismatched SHA256: {response}"
+                logger.error(message)
+                raise SMPUploadError(message)
+
+    async def _pipelined_image_upload(
+        self,
+        image: bytes,
+        response: smpimg.ImageUploadWriteResponse,
+        slot: int,
+        upgrade: bool,
+        max_requests_in_flight: int,
+        timeout_s: float,
+    ) -> AsyncIterator[int]:
+        """Upload the rest of an `image` following the first `response`, yielding the offset.
+
+        Up to `max_requests_in_flight` `ImageUploadWrite` requests are sent
+        before awaiting the response to the oldest one.  The SMP server handles
+        requests in order, so the responses are received in the order that the
+        requests were sent.
+        """
+
+        if response.off is None:
+            raise SMPUploadError(f"No offset received: {response=}")
+        off = response.off
+        next_off = off
+        in_flight: Final[Deque[ImageUploadWrite]] = deque()
+
+        def checked(
+            response: smpimg.ImageUploadWriteResponse
+            | smpimg.ImageManagementErrorV1
+            | smpimg.ImageManagementErrorV2,
+        ) -> Tuple[int, smpimg.ImageUploadWriteResponse]:
             if error(response):
                 raise SMPUploadError(response)
             elif success(response):
                 if response.off is None:
                     raise SMPUploadError(f"No offset received: {response=}")
-                yield response.off
+                return response.off, response
             else:
                 assert_never(response)  # pragma: no cover
 
-        logger.info("Upload complete")
+        try:
+            while off != len(image):
+                try:
+                    async with timeout(timeout_s):
+                        while len(in_flight) < max_requests_in_flight and next_off < len(image):
+                            request = self._maximize_image_upload_write_packet(
+                                ImageUploadWrite(
+                                    off=next_off,
+                                    data=b"",
+                                    len=len(image) if next_off == 0 else None,
+                                    image=slot if next_off == 0 else None,
+                                    upgrade=upgrade if next_off == 0 else None,
+                                ),
+                                image,
+                            )
+                            await self._transport.send(request.BYTES)
+                            in_flight.append(request)
+                            next_off = request.off + len(request.data)
+
+                        request = in_flight.popleft()
+                        frame = await self._transport.receive()
+                except asyncio.TimeoutError:
+                    timeout_message = f"Timeout ({timeout_s}s) waiting for request {request}"
+                    logger.error(timeout_message)
+                    raise TimeoutError(timeout_message)
+
+                off, response = checked(self._load_response(request, frame))
+                yield off
+
+                if off != request.off + len(request.data):
+                    # The SMP server did not accept the chunk at the offset that it was
+                    # sent, so the requests in flight are no longer valid.  Collect their
+                    # responses and resume from the offset that the server reports last.
+                    logger.warning(
+                        f"Expected offset {request.off + len(request.data)}, got {off}; "
+                        f"discarding {len(in_flight)} requests in flight"
+                    )
+                    while len(in_flight) > 0:
+                        request = in_flight.popleft()
+                        off, response = checked(await self._receive_response(request, timeout_s))
+                    next_off = off
+        except (SMPUploadError, SMPBadSequence, ValidationError, TimeoutError):
+            # The responses to the requests in flight would otherwise be received as
+            # the responses to the requests that follow, so receive and discard them.
+            if len(in_flight) > 0:
+                logger.warning(f"Discarding the responses to {len(in_flight)} requests in flight")
+            while len(in_flight) > 0:
+                discarded = in_flight.popleft()
+                try:
+                    async with timeout(timeout_s):
+                        await self._transport.receive()
+                except asyncio.TimeoutError:
+                    logger.error(f"Timeout ({timeout_s}s) waiting for request {discarded}")
+                    break
+            raise
 
-        if response.match is not None:
-            logger.info(f"Server reports {response.match=}")
-            if response.match is not True:
-                message: Final = f"Upload failed, server reported mismatched SHA256: {response}"
-                logger.error(message)
-                raise SMPUploadError(message)
+        logger.info("Upload complete")
+        self._check_upload_match(response)
 
     async def upload_file(
         self,
@@ -407,6 +579,32 @@ class SMPClient:
             logger.error(f"Exception in SMPClient: {exc_type=}, {exc_value=}, {traceback=}")
         await self.disconnect()
 
+    async def _receive_response(
+        self, request: SMPRequest[TRep, TEr1, TEr2], timeout_s: float
+    ) -> TRep | TEr1 | TEr2:
+        """Receive the Response or Error to a `request` that has already been sent.
+
+        Args:
+            request: the `SMPRequest` that was sent
+            timeout_s: the timeout for the response in seconds
+
+        Returns:
+            The typed and validated Response or Error
+
+        Raises:
+            TimeoutError: if the response times out
+        """
+
+        try:
+            async with timeout(timeout_s):
+                frame = await self._transport.receive()
+        except asyncio.TimeoutError:
+            timeout_message: Final = f"Timeout ({timeout_s}s) waiting for request {request}"
+            logger.error(timeout_message)
+            raise TimeoutError(timeout_message)
+
+        return self._load_response(request, frame)
+
     @staticmethod
     def _cbor_integer_size(integer: int) -> int:
         """CBOR integers are packed as small as possible."""
@@ -498,6 +696,7 @@ class SMPClient:
                 if success(mcumgr_parameters):
                     logger.debug(f"MCUMgr parameters: {mcumgr_parameters}")
                     self._transport.initialize(mcumgr_parameters.buf_size)
+                    self._smp_server_transport_buffer_count = mcumgr_parameters.buf_count
                 elif error(mcumgr_parameters):
                     logger.warning(f"Error reading MCUMgr parameters: {mcumgr_parameters}")
                 else:
@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from typing import Protocol, Type, TypeVar, Union
+from typing import Final, Protocol, Type, TypeVar, Union
 
 from smp import error as smperror
 from smp import header as smphdr
@@ -18,6 +18,11 @@ TEr2 = TypeVar("TEr2", bound=smperror.ErrorV2)
 TRep = TypeVar("TRep", bound=Union[smpmessage.ReadResponse, smpmessage.WriteResponse])
 """Type of successful SMP Response (ReadResponse or WriteResponse)."""
 
+# Enum members are singletons, so the type narrowing helpers compare by identity.
+_SUCCESS: Final = smpmessage.ResponseType.SUCCESS
+_ERROR_V1: Final = smpmessage.ResponseType.ERROR_V1
+_ERROR_V2: Final = smpmessage.ResponseType.ERROR_V2
+
 
 class SMPRequest(Protocol[TRep, TEr1, TEr2]):
     """A `Protocol` that groups the expected response and errors with a request.
@@ -56,7 +61,7 @@ def error_v1(response: smperror.ErrorV1 | TEr2 | TRep) -> TypeIs[smperror.ErrorV
     Returns:
         `True` if the `response` is an `ErrorV1`.
     """
-    return response.RESPONSE_TYPE == smpmessage.ResponseType.ERROR_V1
+    return response.RESPONSE_TYPE is _ERROR_V1
 
 
 def error_v2(response: smperror.ErrorV1 | TEr2 | TRep) -> TypeIs[TEr2]:
@@ -68,7 +73,7 @@ def error_v2(response: smperror.ErrorV1 | TEr2 | TRep) -> TypeIs[TEr2]:
     Returns:
         `True` if the `response` is an `ErrorV2`.
     """
-    return response.RESPONSE_TYPE == smpmessage.ResponseType.ERROR_V2
+    return response.RESPONSE_TYPE is _ERROR_V2
 
 
 def error(response: smperror.ErrorV1 | TEr2 | TRep) -> TypeIs[smperror.ErrorV1 | TEr2]:
@@ -80,7 +85,8 @@ def error(response: smperror.ErrorV1 | TEr2 | TRep) -> TypeIs[smperror.ErrorV1 |
     Returns:
         `True` if the `response` is an `ErrorV1` or `ErrorV2`.
     """
-    return error_v1(response) or error_v2(response)
+    response_type: Final = response.RESPONSE_TYPE
+    return response_type is _ERROR_V1 or response_type is _ERROR_V2
 
 
 def success(response: smperror.ErrorV1 | TEr2 | TRep) -> TypeIs[TRep]:
@@ -92,4 +98,4 @@ def success(response: smperror.ErrorV1 | TEr2 | TRep) -> TypeIs[TRep]:
     Returns:
         `True` if the `response` is a successful `Response`.
     """
-    return response.RESPONSE_TYPE == smpmessage.ResponseType.SUCCESS
+    return response.RESPONSE_TYPE is _SUCCESS
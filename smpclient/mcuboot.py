@@ -6,12 +6,18 @@ Specification: https://docs.mcuboot.com/design.html
 from __future__ import annotations
 
 import argparse
+import hashlib
+import os
 import pathlib
+import stat
 import struct
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from enum import IntEnum, IntFlag, unique
 from functools import cached_property
 from io import BufferedReader, BytesIO
-from typing import Dict, Final, List
+from typing import Any, Dict, Final, Iterable, List, Tuple
 
 from intelhex import hex2bin  # type: ignore
 from pydantic.dataclasses import dataclass
@@ -34,6 +40,13 @@ assert IMAGE_TLV_INFO_STRUCT.size == 4
 IMAGE_TLV_STRUCT: Final = struct.Struct("<BxH")
 assert IMAGE_TLV_STRUCT.size == 4
 
+# bound methods of the structs, hoisted to skip the attribute lookup in the parsers
+_unpack_image_version: Final = IMAGE_VERSION_STRUCT.unpack
+_unpack_image_header: Final = IMAGE_HEADER_STRUCT.unpack
+_iter_unpack_image_header: Final = IMAGE_HEADER_STRUCT.iter_unpack
+_unpack_image_tlv_info: Final = IMAGE_TLV_INFO_STRUCT.unpack
+_unpack_image_tlv_from: Final = IMAGE_TLV_STRUCT.unpack_from
+
 
 class MCUBootImageError(Exception):
     ...
@@ -102,7 +115,7 @@ class ImageVersion:
     @staticmethod
     def loads(data: bytes) -> 'ImageVersion':
         """Load an `ImageVersion` from `bytes`."""
-        return ImageVersion(*IMAGE_VERSION_STRUCT.unpack(data))
+        return ImageVersion(*_unpack_image_version(data))
 
     def __str__(self) -> str:
         return f"{self.major}.{self.minor}.{self.revision}-build{self.build_num}"
@@ -123,6 +136,19 @@ class ImageHeader:
     @staticmethod
     def loads(data: bytes) -> 'ImageHeader':
         """Load an `ImageHeader` from `bytes`."""
+        return ImageHeader._from_fields(_unpack_image_header(data))
+
+    @staticmethod
+    def loads_many(data: bytes) -> List['ImageHeader']:
+        """Load consecutive `ImageHeader`s from `bytes`.
+
+        `data` must be a concatenation of `IMAGE_HEADER_SIZE` byte headers.
+        """
+        return [ImageHeader._from_fields(fields) for fields in _iter_unpack_image_header(data)]
+
+    @staticmethod
+    def _from_fields(fields: Tuple[Any, ...]) -> 'ImageHeader':
+        """Create an `ImageHeader` from the fields unpacked by `IMAGE_HEADER_STRUCT`."""
         (
             magic,
             load_addr,
@@ -131,7 +157,7 @@ class ImageHeader:
             img_size,
             flags,
             *ver,
-        ) = IMAGE_HEADER_STRUCT.unpack(data)
+        ) = fields
         return ImageHeader(
             magic=magic,
             load_addr=load_addr,
@@ -177,7 +203,7 @@ class ImageTLVInfo:
     @staticmethod
     def loads(data: bytes) -> 'ImageTLVInfo':
         """Load an `ImageTLVInfo` from bytes."""
-        return ImageTLVInfo(*IMAGE_TLV_INFO_STRUCT.unpack(data))
+        return ImageTLVInfo(*_unpack_image_tlv_info(data))
 
     @staticmethod
     def load_from(file: BytesIO | BufferedReader) -> 'ImageTLVInfo':
@@ -196,7 +222,7 @@ class ImageTLV:
     @staticmethod
     def load_from(file: BytesIO | BufferedReader) -> 'ImageTLV':
         """Load an `ImageTLV` from a file."""
-        return ImageTLV(*IMAGE_TLV_STRUCT.unpack_from(file.read(IMAGE_TLV_STRUCT.size)))
+        return ImageTLV(*_unpack_image_tlv_from(file.read(IMAGE_TLV_STRUCT.size)))
 
 
 @dataclass(frozen=True)
@@ -212,6 +238,116 @@ class ImageTLVValue:
         return f"{self.header.type.name}={self.value.hex()}"
 
 
+def _scan_tlvs(image: bytes, start: int, end: int) -> List[Tuple[int, int, int]]:
+    """Return the `(type, offset, len)` of each TLV in `image[start:end]`.
+
+    The TLV headers are unpacked in place so that the scan doesn't allocate a
+    stream read, header, or value copy per TLV.
+    """
+    TLV_SIZE: Final = IMAGE_TLV_STRUCT.size
+
+    tlvs: Final[List[Tuple[int, int, int]]] = []
+    offset = start
+    while offset < end:
+        tlv_type, length = _unpack_image_tlv_from(image, offset)
+        offset += TLV_SIZE
+        tlvs.append((tlv_type, offset, length))
+        offset += length
+    return tlvs
+
+
+def _hex2bin_cache_dir() -> pathlib.Path | None:
+    """Return this user's private directory for caching hex2bin output, if it is safe to use.
+
+    The directory is created in the temp directory, which may be shared with
+    other users, so it is only trusted if it is a real directory that is owned
+    by this user and that nobody else can access.
+    """
+    if sys.platform == "win32":  # the temp directory is already private to the user
+        cache_dir = pathlib.Path(tempfile.gettempdir(), "smpclient-mcuimg")
+        try:
+            cache_dir.mkdir(exist_ok=True)
+        except OSError:
+            return None
+        return cache_dir
+
+    uid: Final = os.getuid()
+    cache_dir = pathlib.Path(tempfile.gettempdir(), f"smpclient-mcuimg-{uid}")
+    try:
+        cache_dir.mkdir(mode=0o700, exist_ok=True)
+        dir_stat: Final = os.lstat(cache_dir)
+    except OSError:
+        return None
+    if (
+        not stat.S_ISDIR(dir_stat.st_mode)
+        or dir_stat.st_uid != uid
+        or dir_stat.st_mode & (stat.S_IRWXG | stat.S_IRWXO)
+    ):
+        return None
+    return cache_dir
+
+
+def _hex2bin_cached(file_path: pathlib.Path) -> bytes:
+    """Convert the Intel HEX file at `file_path` to binary, caching the result.
+
+    Parsing Intel HEX is slow, so the binary is saved in a private cache
+    directory, keyed by the path and a digest of the contents of the HEX file.
+    Only the latest binary of each HEX file is kept.
+    """
+    # blake2b is only used to derive a short cache key from the path
+    path_digest: Final = hashlib.blake2b(
+        str(file_path.resolve()).encode(), digest_size=8
+    ).hexdigest()
+    # the contents are hashed rather than trusting the modification time, which
+    # is not changed by a rebuild in reproducible builds or by copies that keep it
+    with open(file_path, 'rb') as f:
+        hex_digest: Final = hashlib.sha256(f.read()).hexdigest()
+
+    cache_dir: Final = _hex2bin_cache_dir()
+    cache_path: Final = (
+        None if cache_dir is None else cache_dir / f"mcuimg-{path_digest}-{hex_digest}.bin"
+    )
+
+    if cache_path is not None:
+        try:
+            with open(cache_path, 'rb') as f:
+                cache_stat = os.fstat(f.fileno())
+                if sys.platform == "win32" or (
+                    cache_stat.st_uid == os.getuid()
+                    and not cache_stat.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+                ):
+                    return f.read()
+        except OSError:
+            pass
+
+    with BytesIO() as f:
+        ret = hex2bin(str(file_path), f)
+        if ret != 0:
+            raise MCUBootImageError(f"hex2bin() ret: {ret}")
+        image: Final = f.getvalue()
+
+    if cache_path is None:
+        return image
+
+    try:  # write to a temporary file and rename so that readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=cache_path.parent, prefix=f"{cache_path.name}.")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(image)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            os.unlink(tmp_path)
+            raise
+        # remove the binaries of previous versions of the HEX file
+        for stale_path in cache_path.parent.glob(f"mcuimg-{path_digest}-*.bin"):
+            if stale_path != cache_path:
+                stale_path.unlink()
+    except OSError:  # the cache is an optimization, so failing to write it is not an error
+        pass
+
+    return image
+
+
 @dataclass(frozen=True)
 class ImageInfo:
     """A summary of an MCUBoot FW update image."""
@@ -238,44 +374,51 @@ class ImageInfo:
             )
 
         if file_path.suffix == ".bin":
-            with open(file_path, 'rb') as _f:
-                f = BytesIO(_f.read())
+            with open(file_path, 'rb') as f:
+                image = f.read()
         else:
-            f = BytesIO()
-            ret = hex2bin(str(file_path), f)
-            if ret != 0:
-                raise MCUBootImageError(f"hex2bin() ret: {ret}")
+            image = _hex2bin_cached(file_path)
 
-        f.seek(0)  # move to the start of the image
-        image_header = ImageHeader.load_from(f)
+        image_header = ImageHeader.loads(image[: IMAGE_HEADER_STRUCT.size])
 
         tlv_offset = image_header.hdr_size + image_header.img_size
+        tlv_info = ImageTLVInfo.loads(image[tlv_offset : tlv_offset + IMAGE_TLV_INFO_STRUCT.size])
 
-        f.seek(tlv_offset)  # move to the start of the TLV area
-        tlv_info = ImageTLVInfo.load_from(f)
-
-        tlvs: List[ImageTLVValue] = []
-        while f.tell() < tlv_offset + tlv_info.tlv_tot:
-            tlv_header = ImageTLV.load_from(f)
-            tlvs.append(ImageTLVValue(header=tlv_header, value=f.read(tlv_header.len)))
+        tlvs: Final = [
+            ImageTLVValue(
+                header=ImageTLV(IMAGE_TLV(tlv_type), length), value=image[offset : offset + length]
+            )
+            for tlv_type, offset, length in _scan_tlvs(
+                image, tlv_offset + IMAGE_TLV_INFO_STRUCT.size, tlv_offset + tlv_info.tlv_tot
+            )
+        ]
 
         return ImageInfo(file=path, header=image_header, tlv_info=tlv_info, tlvs=tlvs)
 
+    @staticmethod
+    def load_files(paths: Iterable[str], workers: int | None = None) -> List['ImageInfo']:
+        """Load MCUBoot `ImageInfo` from each of the .bin or .hex files in `paths`.
+
+        The files are loaded concurrently by a pool of `workers` threads, since
+        reading the files dominates the cost of a bulk scan.  The returned list
+        is in the same order as `paths`.
+        """
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(ImageInfo.load_file, paths))
+
     @cached_property
     def _map_tlv_type_to_value(self) -> Dict[IMAGE_TLV, ImageTLVValue]:
         return {tlv.header.type: tlv for tlv in self.tlvs}
 
     def __str__(self) -> str:
-        rep = (
-            f"{self.__class__.__name__}{': ' + self.file if self.file is not None else ''}\n"
-            f"{self.header}\n"
-            f"{self.tlv_info}\n"
-        )
-
-        for tlv in self.tlvs:
-            rep += f"  {str(tlv)}\n"
-
-        return rep
+        lines: Final = [
+            f"{self.__class__.__name__}{': ' + self.file if self.file is not None else ''}",
+            str(self.header),
+            str(self.tlv_info),
+        ]
+        lines.extend(f"  {str(tlv)}" for tlv in self.tlvs)
+
+        return "\n".join(lines) + "\n"
 
 
 def mcuimg() -> int:
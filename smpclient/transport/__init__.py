@@ -2,11 +2,17 @@
 
 from __future__ import annotations
 
+from functools import cached_property
 from typing import Protocol
 
 
-class SMPTransportDisconnected(Exception):
-    """Raised when the SMP transport is disconnected."""
+class SMPTransportDisconnected(ConnectionError):
+    """Raised when the SMP transport is disconnected.
+
+    This is a `ConnectionError`, so it is caught by handlers written for the
+    builtin connection errors.  Chain the cause when there is one:
+    `raise SMPTransportDisconnected("why") from exc`.
+    """
 
 
 class SMPTransport(Protocol):
@@ -33,6 +39,9 @@ class SMPTransport(Protocol):
     async def receive(self) -> bytes:  # pragma: no cover
         """Receive the decoded `SMPResponse` data.
 
+        `SMPTransportDisconnected` is raised if the connection is lost while
+        waiting, rather than waiting forever.
+
         Returns:
             The `SMPResponse` bytes.
         """
@@ -54,24 +63,19 @@ class SMPTransport(Protocol):
             smp_server_transport_buffer_size: The SMP server transport buffer size, in 8-bit bytes.
         """
         self._smp_server_transport_buffer_size = smp_server_transport_buffer_size
+        self.__dict__.pop("max_unencoded_size", None)  # recompute the cached_property
 
     @property
     def mtu(self) -> int:  # pragma: no cover
         """The Maximum Transmission Unit (MTU) in 8-bit bytes."""
 
-    @property
+    @cached_property
     def max_unencoded_size(self) -> int:  # pragma: no cover
-        """The maximum size of an unencoded message that can be sent, in 8-bit bytes."""
-
-        # There is a potential speedup in the future by taking advantage of the
-        # multiple buffers that are provided by the SMP server implementation.
-        # Generally, the idea is to send as many as buf_count messages BEFORE
-        # awaiting the response.  This will allow the SMP server to buffer the
-        # new IO while waiting for flash writes to complete.  It creates some
-        # complexity in both the client and server and it's debatable whether
-        # or not the speedup is worth the complexity.  Specifically, if there is
-        # an error in some write, then some of the writes that have already been
-        # sent out are no longer valid.  That is, the response to each
-        # concurrent write needs to be tracked very carefully!
+        """The maximum size of an unencoded message that can be sent, in 8-bit bytes.
+
+        This is read for every packet of an upload, so it is cached.  Transports
+        whose `mtu` can change, like BLE after connecting, must delete the
+        cached value when it does.
+        """
 
         return self._smp_server_transport_buffer_size or self.mtu
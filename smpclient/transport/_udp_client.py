@@ -4,10 +4,13 @@ from __future__ import annotations
 
 import asyncio
 import logging
-from typing import Any, Final, NamedTuple, Tuple
+from collections import deque
+from typing import Any, Deque, Final, NamedTuple, Tuple
 
 from typing_extensions import override
 
+from smpclient.transport import SMPTransportDisconnected
+
 logger = logging.getLogger(__name__)
 
 
@@ -35,13 +38,17 @@ class UDPClient:
         ```
         """
 
-        self._transport, self._protocol = await asyncio.get_running_loop().create_datagram_endpoint(
-            lambda: _UDPProtocol(),
+        self._loop = asyncio.get_running_loop()
+        self._transport, self._protocol = await self._loop.create_datagram_endpoint(
+            lambda: _UDPProtocol(self._loop),
             remote_addr=remote_addr,
             local_addr=_local_addr,
         )
+        # bound once here, rather than resolved on every call
+        self._sendto = self._transport.sendto
+        self._close = self._transport.close
 
-    def send(self, data: bytes) -> None:
+    def send(self, data: bytes | memoryview) -> None:
         """Send data to the transport.
 
         This does not block; it buffers the data and arranges for it to be sent
@@ -51,54 +58,97 @@ class UDPClient:
             data: The data to send.
         """
 
-        self._transport.sendto(data)
+        self._sendto(data)
 
     async def receive(self) -> bytes:
         """Receive data from the transport.
 
         Returns:
             bytes: The data received
+
+        The errors of the transport are raised when they are reached; the
+        `SMPTransportDisconnected` error is raised if the connection was lost.
         """
 
-        return await self._protocol.receive_queue.get()
+        return await self._protocol.receive()
 
     def disconnect(self) -> None:
-        self._transport.close()
+        self._close()
 
 
 class _UDPProtocol(asyncio.DatagramProtocol):
     """Implementation of a UDP protocol."""
 
     @override
-    def __init__(self) -> None:
-        self._receive_queue: Final[asyncio.Queue[bytes]] = asyncio.Queue()
-        self._error_queue: Final[asyncio.Queue[Exception]] = asyncio.Queue()
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Initialize the UDP protocol.
+
+        Args:
+            loop: The event loop that the protocol's datagram endpoint runs on.
+        """
+        self._loop: Final = loop
+        self._receive_buffer: Final[Deque[bytes | Exception]] = deque()
+        self._receive_waiter: asyncio.Future[None] | None = None
 
     @override
     def connection_made(self, transport: asyncio.BaseTransport) -> None:
-        logger.debug(f"Connection made, {transport=}")
+        logger.debug("Connection made, transport=%r", transport)
 
     @override
     def datagram_received(self, data: bytes, addr: Tuple[str | Any, int]) -> None:
-        logger.debug(f"{len(data)} B datagram received from {addr}")
-        self._receive_queue.put_nowait(data)
+        logger.debug("%d B datagram received from %s", len(data), addr)
+        self._put(data)
 
     @override
     def error_received(self, exc: Exception) -> None:
-        logger.warning(f"Error received: {exc=}")
-        self._error_queue.put_nowait(exc)
+        logger.warning("Error received: exc=%r", exc)
+        self._put(exc)
 
     @override
     def connection_lost(self, exc: Exception | None) -> None:
         logger.info("Connection lost")
         if exc is not None:
-            logger.error(f"Connection lost {exc=}")
-            self._error_queue.put_nowait(exc)
+            logger.error("Connection lost exc=%r", exc)
+        disconnected: Final = SMPTransportDisconnected("UDP connection lost")
+        disconnected.__cause__ = exc
+        self._put(disconnected)
+
+    def _put(self, item: bytes | Exception) -> None:
+        self._receive_buffer.append(item)
+
+        waiter: Final = self._receive_waiter
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
 
-    @property
-    def receive_queue(self) -> asyncio.Queue[bytes]:
-        return self._receive_queue
+    async def receive(self) -> bytes:
+        """Receive the next datagram.
+
+        There is a single consumer, so a buffer and one `Future` replace the
+        bookkeeping of an `asyncio.Queue`.  Errors are buffered in order with
+        the datagrams and raised when they are reached: an `OSError` from
+        `error_received()` or `SMPTransportDisconnected` from `connection_lost()`.
+
+        Returns:
+            The datagram.
+
+        Raises:
+            RuntimeError: if another coroutine is already waiting to receive
+        """
 
-    @property
-    def error_queue(self) -> asyncio.Queue[Exception]:
-        return self._error_queue
+        while not self._receive_buffer:
+            if self._receive_waiter is not None:
+                raise RuntimeError("receive() called while another coroutine is already waiting")
+            self._receive_waiter = self._loop.create_future()
+            try:
+                await self._receive_waiter
+            finally:
+                self._receive_waiter = None
+
+        return self._datagram_or_raise(self._receive_buffer.popleft())
+
+    @staticmethod
+    def _datagram_or_raise(item: bytes | Exception) -> bytes:
+        """Return the datagram `item`, or raise it if it is an error."""
+        if isinstance(item, Exception):
+            raise item
+        return item
@@ -10,6 +10,7 @@ from typing import Final, List, Protocol
 from uuid import UUID
 
 from bleak import BleakClient, BleakGATTCharacteristic, BleakScanner
+from bleak.assigned_numbers import AdvertisementDataType
 from bleak.backends.client import BaseBleakClient
 from bleak.backends.device import BLEDevice
 from smp import header as smphdr
@@ -43,6 +44,12 @@ else:  # stub for mypy
 SMP_SERVICE_UUID: Final = UUID("8D53DC1D-1DB7-4CD3-868B-8A527460AA84")
 SMP_CHARACTERISTIC_UUID: Final = UUID("DA2E7828-FBCE-4E01-AE9E-261174997C48")
 
+# bleak identifies services and characteristics by lowercase UUID strings
+_SMP_SERVICE_UUID_STR: Final = str(SMP_SERVICE_UUID)
+_SMP_CHARACTERISTIC_UUID_STR: Final = str(SMP_CHARACTERISTIC_UUID)
+_SMP_SERVICE_UUID_LE: Final = SMP_SERVICE_UUID.bytes_le
+"""The SMP service UUID as it appears in advertising data."""
+
 MAC_ADDRESS_PATTERN: Final = re.compile(r"([0-9A-F]{2}[:]){5}[0-9A-F]{2}$", flags=re.IGNORECASE)
 UUID_PATTERN: Final = re.compile(
     r"^[a-f0-9]{8}-?[a-f0-9]{4}-?4[a-f0-9]{3}-?[89ab][a-f0-9]{3}-?[a-f0-9]{12}\Z",
@@ -70,7 +77,10 @@ class SMPBLETransport(SMPTransport):
 
     def __init__(self) -> None:
         self._buffer = bytearray()
-        self._notify_condition = asyncio.Condition()
+        self._message_length: int | None = None
+        """The length of the SMP message at the start of `_buffer`, once its header is received."""
+        self._receive_waiter: asyncio.Future[None] | None = None
+        """Set by `receive()` while it waits for the rest of a message."""
         self._disconnected_event = asyncio.Event()
         self._disconnected_event.set()
 
@@ -91,7 +101,7 @@ class SMPBLETransport(SMPTransport):
         if type(device) is BLEDevice:
             self._client = BleakClient(
                 device,
-                services=(str(SMP_SERVICE_UUID),),
+                services=(_SMP_SERVICE_UUID_STR,),
                 disconnected_callback=self._set_disconnected_event,
             )
         else:
@@ -132,6 +142,7 @@ class SMPBLETransport(SMPTransport):
             self._max_write_without_response_size = self._client.mtu_size - 3
 
         logger.info(f"{self._max_write_without_response_size=}")
+        self.__dict__.pop("max_unencoded_size", None)  # the MTU has changed
         self._smp_characteristic = smp_characteristic
 
         logger.debug(f"Starting notify on {SMP_CHARACTERISTIC_UUID=}")
@@ -146,51 +157,67 @@ class SMPBLETransport(SMPTransport):
 
     @override
     async def send(self, data: bytes) -> None:
-        logger.debug(f"Sending {len(data)} bytes, {self.mtu=}")
-        for offset in range(0, len(data), self.mtu):
+        mtu: Final = self.mtu
+        logger.debug("Sending %d bytes, mtu=%r", len(data), mtu)
+        view: Final = memoryview(data)  # bleak accepts any buffer, so don't copy each fragment
+        for offset in range(0, len(data), mtu):
             await self._client.write_gatt_char(
-                self._smp_characteristic, data[offset : offset + self.mtu], response=False
+                self._smp_characteristic, view[offset : offset + mtu], response=False
             )
-        logger.debug(f"Sent {len(data)} bytes")
+        logger.debug("Sent %d bytes", len(data))
 
     @override
     async def receive(self) -> bytes:
-        # Note: self._buffer is mutated asynchronously by this method and self._notify_callback().
-        #       self._notify_condition is used to synchronize access to self._buffer.
-
-        async with self._notify_condition:  # wait for the header
-            logger.debug(f"Waiting for notify on {SMP_CHARACTERISTIC_UUID=}")
-            await self._notify_or_disconnect()
-
-            if len(self._buffer) < smphdr.Header.SIZE:  # pragma: no cover
-                raise SMPBLETransportException(
-                    f"Buffer contents not big enough for SMP header: {self._buffer=}"
+        # Note: self._buffer is mutated by this method and self._notify_callback(), which both
+        #       run on the event loop.  self._receive_waiter is resolved by the callbacks once
+        #       the message is complete or the client disconnects.
+
+        # a previous notify may have already buffered this response
+        while (message_length := self._complete_message_length()) is None:
+            if self._disconnected_event.is_set():
+                raise SMPTransportDisconnected(
+                    f"{self.__class__.__name__} disconnected from {self._client.address}"
                 )
-
-            header: Final = smphdr.Header.loads(self._buffer[: smphdr.Header.SIZE])
-            logger.debug(f"Received {header=}")
-
-        message_length: Final = header.length + header.SIZE
-        logger.debug(f"Waiting for the rest of the {message_length} byte response")
-
-        while True:  # wait for the rest of the message
-            async with self._notify_condition:
-                if len(self._buffer) == message_length:
-                    logger.debug(f"Finished receiving {message_length} byte response")
-                    out = bytes(self._buffer)
-                    self._buffer.clear()
-                    return out
-                elif len(self._buffer) > message_length:  # pragma: no cover
-                    raise SMPBLETransportException("Length of buffer passed expected message size.")
-                await self._notify_or_disconnect()
+            logger.debug("Waiting for notify on the SMP characteristic")
+            self._receive_waiter = asyncio.get_running_loop().create_future()
+            try:
+                await self._receive_waiter
+            finally:
+                self._receive_waiter = None
+
+        logger.debug("Finished receiving %d byte response", message_length)
+        with memoryview(self._buffer) as view:  # copy the message once, not via a slice
+            out = view[:message_length].tobytes()
+        # keep any bytes of the next response when requests are pipelined
+        del self._buffer[:message_length]
+        self._message_length = None
+        return out
+
+    def _complete_message_length(self) -> int | None:
+        """Return the length of the SMP message at the start of the buffer, if it is complete."""
+
+        if self._message_length is None:
+            if len(self._buffer) < smphdr.Header.SIZE:
+                return None
+            header: Final = smphdr.Header.loads(bytes(self._buffer[: smphdr.Header.SIZE]))
+            logger.debug("Received header=%r", header)
+            self._message_length = header.length + header.SIZE
+
+        return self._message_length if len(self._buffer) >= self._message_length else None
 
     async def _notify_callback(self, sender: BleakGATTCharacteristic, data: bytes) -> None:
-        if sender.uuid != str(SMP_CHARACTERISTIC_UUID):  # pragma: no cover
+        if sender.uuid != _SMP_CHARACTERISTIC_UUID_STR:  # pragma: no cover
             raise SMPBLETransportException(f"Unexpected notify from {sender}; {data=}")
-        async with self._notify_condition:
-            logger.debug(f"Received {len(data)} bytes from {SMP_CHARACTERISTIC_UUID=}")
-            self._buffer.extend(data)
-            self._notify_condition.notify()
+        logger.debug("Received %d bytes from the SMP characteristic", len(data))
+        self._buffer.extend(data)
+        # only wake receive() once the whole message has been received
+        if self._complete_message_length() is not None:
+            self._wake_receive()
+
+    def _wake_receive(self) -> None:
+        waiter: Final = self._receive_waiter
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
 
     async def send_and_receive(self, data: bytes) -> bytes:
         await self.send(data)
@@ -202,14 +229,47 @@ class SMPBLETransport(SMPTransport):
         return self._max_write_without_response_size
 
     @staticmethod
-    async def scan(timeout: int = 5) -> List[BLEDevice]:
-        """Scan for BLE devices."""
-        logger.debug(f"Scanning for BLE devices for {timeout} seconds")
-        devices: Final = await BleakScanner(service_uuids=[str(SMP_SERVICE_UUID)]).discover(
-            timeout=timeout, return_adv=True
+    async def scan(timeout: int = 5, passive: bool = False) -> List[BLEDevice]:
+        """Scan for BLE devices.
+
+        Args:
+            timeout: The scan duration in seconds.
+            passive: Scan without requesting scan responses, which are not
+                needed to find the SMP service.  On BlueZ, the SMP service UUID
+                must be the first 128-bit UUID in the advertising data.  macOS
+                does not support passive scanning.
+
+        Returns:
+            The BLE devices that advertise the SMP service.
+        """
+        logger.debug(f"Scanning for BLE devices for {timeout} seconds, {passive=}")
+        scanner: Final = (
+            BleakScanner(
+                service_uuids=[_SMP_SERVICE_UUID_STR],
+                scanning_mode="passive",
+                bluez={
+                    "or_patterns": [
+                        (
+                            0,
+                            AdvertisementDataType.COMPLETE_LIST_SERVICE_UUID128,
+                            _SMP_SERVICE_UUID_LE,
+                        ),
+                        (
+                            0,
+                            AdvertisementDataType.INCOMPLETE_LIST_SERVICE_UUID128,
+                            _SMP_SERVICE_UUID_LE,
+                        ),
+                    ]
+                },
+            )
+            if passive
+            else BleakScanner(service_uuids=[_SMP_SERVICE_UUID_STR])
         )
+        devices: Final = await scanner.discover(timeout=timeout, return_adv=True)
         smp_servers: Final = [
-            d for d, a in devices.values() if SMP_SERVICE_UUID in {UUID(u) for u in a.service_uuids}
+            d
+            for d, a in devices.values()
+            if any(u.lower() == _SMP_SERVICE_UUID_STR for u in a.service_uuids)
         ]
         logger.debug(f"Found {len(smp_servers)} SMP devices: {smp_servers=}")
         return smp_servers
@@ -229,20 +289,4 @@ class SMPBLETransport(SMPTransport):
             )
         logger.warning(f"Disconnected from {client.address}")
         self._disconnected_event.set()
-
-    async def _notify_or_disconnect(self) -> None:
-        disconnected_task: Final = asyncio.create_task(self._disconnected_event.wait())
-        notify_task: Final = asyncio.create_task(self._notify_condition.wait())
-        done, pending = await asyncio.wait(
-            (disconnected_task, notify_task), return_when=asyncio.FIRST_COMPLETED
-        )
-        for task in pending:
-            task.cancel()
-        try:
-            await asyncio.gather(*pending)
-        except asyncio.CancelledError:
-            pass
-        if disconnected_task in done:
-            raise SMPTransportDisconnected(
-                f"{self.__class__.__name__} disconnected from {self._client.address}"
-            )
+        self._wake_receive()
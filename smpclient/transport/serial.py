@@ -7,7 +7,8 @@ from __future__ import annotations
 
 import asyncio
 import logging
-import math
+import re
+import sys
 import time
 from enum import IntEnum, unique
 from functools import cached_property
@@ -21,6 +22,11 @@ from smpclient.transport import SMPTransport, SMPTransportDisconnected
 
 logger = logging.getLogger(__name__)
 
+_SMP_DELIMITER_PATTERN: Final = re.compile(
+    re.escape(smppacket.SIXTY_NINE) + b"|" + re.escape(smppacket.FOUR_TWENTY)
+)
+"""Matches the first SMP start or continue delimiter in a single scan."""
+
 
 def _base64_cost(size: int) -> int:
     """The worst case size required to encode `size` `bytes`."""
@@ -28,7 +34,7 @@ def _base64_cost(size: int) -> int:
     if size == 0:
         return 0
 
-    return math.ceil(4 / 3 * size) + 2
+    return (4 * size + 2) // 3 + 2  # ceil(4 / 3 * size) in integer arithmetic
 
 
 def _base64_max(size: int) -> int:
@@ -37,7 +43,7 @@ def _base64_max(size: int) -> int:
     if size < 4:
         return 0
 
-    return math.floor(3 / 4 * size) - 2
+    return 3 * size // 4 - 2  # floor(3 / 4 * size) in integer arithmetic
 
 
 class SMPSerialTransport(SMPTransport):
@@ -167,22 +173,29 @@ class SMPSerialTransport(SMPTransport):
             raise ValueError(
                 f"Data size {len(data)} exceeds maximum unencoded size {self.max_unencoded_size}"
             )
-        logger.debug(f"Sending {len(data)} bytes")
+        logger.debug("Sending %d bytes", len(data))
         try:
-            for packet in smppacket.encode(data, line_length=self._line_length):
-                self._conn.write(packet)
-                logger.debug(f"Writing encoded packet of size {len(packet)}B; {self._line_length=}")
+            # the packets are written back to back, so write them with one call
+            packets: Final = b"".join(smppacket.encode(data, line_length=self._line_length))
+            self._conn.write(packets)
+            logger.debug(
+                "Writing encoded packets of size %dB; self._line_length=%r",
+                len(packets),
+                self._line_length,
+            )
 
-            # fake async until I get around to replacing pyserial
+            # Wait for the OS to drain the output buffer.  Poll rather than run the
+            # blocking flush() in a thread so that the wait can be cancelled, e.g.
+            # by a request timeout when hardware flow control never lets it drain.
             while self._conn.out_waiting > 0:
                 await asyncio.sleep(SMPSerialTransport._POLLING_INTERVAL_S)
         except SerialException as e:
             logger.error(f"Failed to send {len(data)} bytes: {e}")
             raise SMPTransportDisconnected(
                 f"{self.__class__.__name__} disconnected from {self._conn.port}"
-            )
+            ) from e
 
-        logger.debug(f"Sent {len(data)} bytes")
+        logger.debug("Sent %d bytes", len(data))
 
     @override
     async def receive(self) -> bytes:
@@ -195,109 +208,128 @@ class SMPSerialTransport(SMPTransport):
                 b = await self._readuntil()
                 decoder.send(b)
             except StopIteration as e:
-                logger.debug(f"Finished receiving {len(e.value)} byte response")
+                logger.debug("Finished receiving %d byte response", len(e.value))
                 return e.value
             except SerialException as e:
                 logger.error(f"Failed to receive response: {e}")
                 raise SMPTransportDisconnected(
                     f"{self.__class__.__name__} disconnected from {self._conn.port}"
-                )
+                ) from e
 
     async def _readuntil(self) -> bytes:
         """Read `bytes` until the `delimiter` then return the `bytes` including the `delimiter`."""
 
-        START_DELIMITER: Final = smppacket.SIXTY_NINE
-        CONTINUE_DELIMITER: Final = smppacket.FOUR_TWENTY
         END_DELIMITER: Final = b"\n"
+        State: Final = SMPSerialTransport._ReadBuffer.State
+        buffer: Final = self._buffer
 
-        # fake async until I get around to replacing pyserial
+        # pyserial is not async, so _wait_for_data() waits for the port to be
+        # readable on POSIX and falls back to polling on Windows
 
         i_smp_start = 0
         i_smp_end = 0
-        i_start: int | None = None
-        i_continue: int | None = None
         while True:
-            if self._buffer.state == SMPSerialTransport._ReadBuffer.State.SER:
+            if buffer.state == State.SER:
                 # read the entire OS buffer
                 try:
-                    self._buffer.ser.extend(self._conn.read_all() or [])
+                    buffer.ser.extend(self._conn.read_all() or [])
                 except StopIteration:
                     pass
 
-                try:  # search the buffer for the index of the start delimiter
-                    i_start = self._buffer.ser.index(START_DELIMITER)
-                except ValueError:
-                    i_start = None
-
-                try:  # search the buffer for the index of the continue delimiter
-                    i_continue = self._buffer.ser.index(CONTINUE_DELIMITER)
-                except ValueError:
-                    i_continue = None
-
-                if i_start is not None and i_continue is not None:
-                    i_smp_start = min(i_start, i_continue)
-                elif i_start is not None:
-                    i_smp_start = i_start
-                elif i_continue is not None:
-                    i_smp_start = i_continue
+                # search the buffer for the index of the first start or continue delimiter
+                delimiter = _SMP_DELIMITER_PATTERN.search(buffer.ser)
+
+                if delimiter is not None:
+                    i_smp_start = delimiter.start()
                 else:  # no delimiters found yet, clear non SMP data and wait
-                    while True:
-                        try:  # search the buffer for newline characters
-                            i = self._buffer.ser.index(b"\n")
-                            try:  # log as a string if possible
-                                logger.warning(
-                                    f"{self._conn.port}: {self._buffer.ser[:i].decode()}"
-                                )
-                            except UnicodeDecodeError:  # log as bytes if not
-                                logger.warning(f"{self._conn.port}: {self._buffer.ser[:i].hex()}")
-                            self._buffer.ser = self._buffer.ser[i + 1 :]
-                        except ValueError:
-                            break
-                    await asyncio.sleep(SMPSerialTransport._POLLING_INTERVAL_S)
+                    # log every complete line in one pass, keeping a partial line for later
+                    i = buffer.ser.rfind(b"\n")
+                    if i != -1:
+                        if logger.isEnabledFor(logging.WARNING):  # skip decoding if not logged
+                            for line in buffer.ser[:i].split(b"\n"):
+                                self._log_device_output(line)
+                        del buffer.ser[: i + 1]
+                    await self._wait_for_data()
                     continue
 
-                if i_smp_start != 0:  # log the rest of the serial buffer
-                    try:  # log as a string if possible
-                        logger.warning(
-                            f"{self._conn.port}: {self._buffer.ser[:i_smp_start].decode()}"
-                        )
-                    except UnicodeDecodeError:  # log as bytes if not
-                        logger.warning(f"{self._conn.port}: {self._buffer.ser[:i_smp_start].hex()}")
-
-                self._buffer.smp = self._buffer.ser[i_smp_start:]
-                self._buffer.ser.clear()
-                self._buffer.state = SMPSerialTransport._ReadBuffer.State.SMP
+                # log the rest of the serial buffer
+                if i_smp_start != 0 and logger.isEnabledFor(logging.WARNING):
+                    self._log_device_output(buffer.ser[:i_smp_start])
+
+                # swap the buffers rather than copying the SMP data between them
+                del buffer.ser[:i_smp_start]
+                buffer.smp.clear()
+                buffer.smp, buffer.ser = buffer.ser, buffer.smp
+                buffer.state = State.SMP
                 i_smp_end = 0
 
                 # don't await since the buffer may already contain the end delimiter
 
-            elif self._buffer.state == SMPSerialTransport._ReadBuffer.State.SMP:
+            elif buffer.state == State.SMP:
                 # read the entire OS buffer
                 try:
-                    self._buffer.smp.extend(self._conn.read_all() or [])
+                    buffer.smp.extend(self._conn.read_all() or [])
                 except StopIteration:
                     pass
 
-                try:  # search the buffer for the index of the delimiter
-                    i_smp_end = self._buffer.smp.index(END_DELIMITER, i_smp_end) + len(
-                        END_DELIMITER
-                    )
-                except ValueError:  # delimiter not found yet, wait
-                    await asyncio.sleep(SMPSerialTransport._POLLING_INTERVAL_S)
+                # search the buffer for the index of the delimiter
+                i_delimiter = buffer.smp.find(END_DELIMITER, i_smp_end)
+                if i_delimiter == -1:  # delimiter not found yet, wait
+                    # the delimiter is a single byte, so don't search these bytes again
+                    i_smp_end = len(buffer.smp)
+                    await self._wait_for_data()
                     continue
+                i_smp_end = i_delimiter + len(END_DELIMITER)
 
-                # out is everything up to and including the delimiter
-                out = self._buffer.smp[:i_smp_end]
-                logger.debug(f"Received {len(out)} byte chunk")
+                # out is everything up to and including the delimiter, copied once as bytes
+                with memoryview(buffer.smp) as view:
+                    out = view[:i_smp_end].tobytes()
+                logger.debug("Received %d byte chunk", len(out))
 
                 # there may be some leftover to save for the next read, but
                 # it's not necessarily SMP data
-                self._buffer.ser = self._buffer.smp[i_smp_end:]
+                del buffer.smp[:i_smp_end]
+                buffer.ser.clear()
+                buffer.ser, buffer.smp = buffer.smp, buffer.ser
 
-                self._buffer.state = SMPSerialTransport._ReadBuffer.State.SER
+                buffer.state = State.SER
 
                 return out
 
+    def _log_device_output(self, data: bytes | bytearray) -> None:
+        """Log non-SMP output from the device as a string if possible, else as hex."""
+
+        try:
+            text = data.decode()
+        except UnicodeDecodeError:
+            text = data.hex()
+        logger.warning("%s: %s", self._conn.port, text)
+
+    async def _wait_for_data(self) -> None:
+        """Wait until the serial port may have more data to read.
+
+        On POSIX, the event loop watches the port's file descriptor.  Windows
+        serial ports cannot be watched by the event loop, so they are polled.
+        """
+
+        if sys.platform == "win32":
+            await asyncio.sleep(SMPSerialTransport._POLLING_INTERVAL_S)
+            return
+
+        loop: Final = asyncio.get_running_loop()
+        readable: Final[asyncio.Future[None]] = loop.create_future()
+        fd: Final = self._conn.fileno()
+
+        def on_readable() -> None:
+            if not readable.done():
+                readable.set_result(None)
+
+        loop.add_reader(fd, on_readable)
+        try:
+            await readable
+        finally:
+            loop.remove_reader(fd)
+
     @override
     async def send_and_receive(self, data: bytes) -> bytes:
         await self.send(data)
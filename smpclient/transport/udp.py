@@ -35,60 +35,58 @@ class SMPUDPTransport(SMPTransport):
     async def disconnect(self) -> None:
         logger.debug("Disconnecting from transport")
         self._client.disconnect()
-
-        if not self._client._protocol.error_queue.empty():
-            logger.warning(
-                f"{self._client._protocol.error_queue.qsize()} exceptions were uncollected before "
-                "disconnecting, fetching them now"
-            )
-            while True:
-                try:
-                    logger.warning(f"{self._client._protocol.error_queue.get_nowait()}")
-                except asyncio.QueueEmpty:
-                    break
-
         logger.info("Disconnected from transport")
 
     @override
     async def send(self, data: bytes) -> None:
-        if len(data) > self.max_unencoded_size:
+        size: Final = self.max_unencoded_size
+        if len(data) > size:
             logger.warning(
                 "Fragmenting UDP packets is not recommended: "
-                f"{len(data)=} B > {self.max_unencoded_size=} B"
+                "len(data)=%d B > self.max_unencoded_size=%d B",
+                len(data),
+                size,
             )
 
-        logger.debug(f"Sending {len(data)} B")
-        for offset in range(0, len(data), self.max_unencoded_size):
-            self._client.send(data[offset : offset + self.max_unencoded_size])
-        logger.debug(f"Sent {len(data)} B")
+        logger.debug("Sending %d B", len(data))
+        view: Final = memoryview(data)  # sendto() accepts any buffer, so don't copy each fragment
+        send: Final = self._client.send
+        for offset in range(0, len(data), size):
+            send(view[offset : offset + size])
+        logger.debug("Sent %d B", len(data))
 
     @override
     async def receive(self) -> bytes:
         logger.debug("Awaiting data")
 
         first_packet: Final = await self._client.receive()
-        logger.debug(f"Received {len(first_packet)} B")
+        logger.debug("Received %d B", len(first_packet))
 
         header: Final = smphdr.Header.loads(first_packet[: smphdr.Header.SIZE])
-        logger.debug(f"Received {header=}")
+        logger.debug("Received header=%r", header)
 
         message_length: Final = header.length + smphdr.Header.SIZE
-        message: Final = bytearray(first_packet)
-
-        if len(message) != message_length:
-            logger.debug(f"Waiting for the rest of the {message_length} B response")
-            while len(message) < message_length:
-                packet = await self._client.receive()
-                logger.debug(f"Received {len(packet)} B")
-                message.extend(packet)
-            if len(message) > message_length:
+        message = first_packet  # the whole response usually fits in one datagram
+
+        if len(first_packet) != message_length:
+            logger.debug("Waiting for the rest of the %d B response", message_length)
+            packets: Final = [first_packet]
+            received = len(first_packet)
+            receive: Final = self._client.receive
+            while received < message_length:
+                packet = await receive()
+                logger.debug("Received %d B", len(packet))
+                packets.append(packet)
+                received += len(packet)
+            if received > message_length:
                 error: Final = (
-                    f"Received more data than expected: {len(message)} B > {message_length} B"
+                    f"Received more data than expected: {received} B > {message_length} B"
                 )
                 logger.error(error)
                 raise SMPClientException(error)
+            message = b"".join(packets)  # join sizes the result once, copying each datagram once
 
-        logger.debug(f"Finished receiving message of length {message_length} B")
+        logger.debug("Finished receiving message of length %d B", message_length)
         return message
 
     @override
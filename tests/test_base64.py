@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import math
 import random
 from base64 import b64encode
 
@@ -27,3 +28,11 @@ def test_base64_sizing() -> None:
         data = random.randbytes(_base64_max(size))  # type: ignore # for python3.8
         encoded = b64encode(data)
         assert 0 <= size - len(encoded) < 4
+
+
+def test_base64_integer_arithmetic() -> None:
+    """Assert that the integer helpers match the original floating point math."""
+
+    for size in range(0xFFFF):
+        assert _base64_cost(size) == (math.ceil(4 / 3 * size) + 2 if size else 0)
+        assert _base64_max(size) == (math.floor(3 / 4 * size) - 2 if size >= 4 else 0)
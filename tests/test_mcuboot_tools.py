@@ -2,13 +2,17 @@
 
 from __future__ import annotations
 
+import os
 import struct
 from pathlib import Path
-from typing import Protocol
+from typing import Generator, List, Protocol
+from unittest.mock import patch
 
 import pytest
+from intelhex import IntelHex, hex2bin  # type: ignore
 
 from smpclient.mcuboot import (
+    IMAGE_HEADER_SIZE,
     IMAGE_MAGIC,
     IMAGE_TLV,
     IMAGE_TLV_INFO_MAGIC,
@@ -18,6 +22,14 @@ from smpclient.mcuboot import (
 )
 
 
+@pytest.fixture(autouse=True)
+def temp_dir(tmp_path_factory: pytest.TempPathFactory) -> Generator[Path, None, None]:
+    """Keep the hex2bin cache out of the real temp directory."""
+    path = tmp_path_factory.mktemp("temp")
+    with patch("smpclient.mcuboot.tempfile.gettempdir", return_value=str(path)):
+        yield path
+
+
 class _ImageFileFixture(Protocol):
     PATH: Path
     SHA256: bytes
@@ -90,6 +102,70 @@ def test_ImageInfo(image: _ImageFileFixture) -> None:
     assert v.value == image.RSA2048_PSS
 
 
+def test_ImageInfo_load_file_hex_cache(temp_dir: Path) -> None:
+    image_info = ImageInfo.load_file(str(SIGNED_HEX.PATH))
+    cached = list(temp_dir.glob("smpclient-mcuimg-*/mcuimg-*.bin"))
+    assert len(cached) == 1
+    assert cached[0].parent.stat().st_mode & 0o777 == 0o700
+
+    # the second load is served from the cache without parsing the HEX file
+    with patch("smpclient.mcuboot.hex2bin", wraps=hex2bin) as hex2bin_mock:
+        assert ImageInfo.load_file(str(SIGNED_HEX.PATH)) == image_info
+        hex2bin_mock.assert_not_called()
+
+    # a cache file that others can write to is not trusted
+    cached[0].chmod(0o666)
+    with patch("smpclient.mcuboot.hex2bin", wraps=hex2bin) as hex2bin_mock:
+        assert ImageInfo.load_file(str(SIGNED_HEX.PATH)) == image_info
+        hex2bin_mock.assert_called_once()
+
+    # nor is a cache directory that others can access
+    cached[0].parent.chmod(0o777)
+    with patch("smpclient.mcuboot.hex2bin", wraps=hex2bin) as hex2bin_mock:
+        assert ImageInfo.load_file(str(SIGNED_HEX.PATH)) == image_info
+        assert ImageInfo.load_file(str(SIGNED_HEX.PATH)) == image_info
+        assert hex2bin_mock.call_count == 2
+
+
+def test_ImageInfo_load_file_hex_cache_rebuilt(temp_dir: Path, tmp_path: Path) -> None:
+    hex_path = tmp_path / "image.hex"
+    ih = IntelHex(str(SIGNED_HEX.PATH))
+    ih.write_hex_file(str(hex_path))
+    mtime_ns = hex_path.stat().st_mtime_ns
+
+    image_info = ImageInfo.load_file(str(hex_path))
+
+    # rebuild the HEX file with a different signature, keeping its size and
+    # modification time, as in a reproducible build
+    ih[ih.maxaddr()] ^= 0xFF
+    ih.write_hex_file(str(hex_path))
+    os.utime(hex_path, ns=(mtime_ns, mtime_ns))
+
+    rebuilt = ImageInfo.load_file(str(hex_path))
+
+    signature = image_info.get_tlv(IMAGE_TLV.RSA2048_PSS).value
+    assert rebuilt.get_tlv(IMAGE_TLV.RSA2048_PSS).value == signature[:-1] + bytes(
+        [signature[-1] ^ 0xFF]
+    )
+
+    # the binary of the previous build is removed
+    assert len(list(temp_dir.glob("smpclient-mcuimg-*/mcuimg-*.bin"))) == 1
+
+
+def test_ImageInfo_load_files() -> None:
+    images: List[_ImageFileFixture] = [SIGNED_BIN, SIGNED_HEX, SIGNED_BIN]
+    paths = [str(image.PATH) for image in images]
+
+    image_infos = ImageInfo.load_files(paths, workers=2)
+
+    assert [i.file for i in image_infos] == paths
+    for image_info, image in zip(image_infos, images):
+        assert image_info.get_tlv(IMAGE_TLV.SHA256).value == image.SHA256
+        assert image_info.get_tlv(IMAGE_TLV.RSA2048_PSS).value == image.RSA2048_PSS
+
+    assert ImageInfo.load_files([]) == []
+
+
 @pytest.mark.parametrize("image", [SIGNED_BIN])
 def test_ImageHeader(image: _ImageFileFixture) -> None:
     h = ImageHeader.load_file(str(image.PATH))
@@ -106,6 +182,20 @@ def test_ImageHeader(image: _ImageFileFixture) -> None:
     assert h.ver.build_num == 0
 
 
+@pytest.mark.parametrize("image", [SIGNED_BIN])
+def test_ImageHeader_loads_many(image: _ImageFileFixture) -> None:
+    with open(image.PATH, "rb") as f:
+        data = f.read(IMAGE_HEADER_SIZE)
+
+    headers = ImageHeader.loads_many(data * 3)
+
+    assert len(headers) == 3
+    for h in headers:
+        assert h == ImageHeader.loads(data)
+
+    assert ImageHeader.loads_many(b"") == []
+
+
 def test_ImageVersion() -> None:
     v = ImageVersion.loads(struct.pack("<BBHL", 1, 0xFF, 0xFFFF, 0xFFFFFFFF))
     assert v.major == 1
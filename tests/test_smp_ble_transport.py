@@ -4,7 +4,7 @@ from __future__ import annotations
 
 import asyncio
 from typing import cast
-from unittest.mock import AsyncMock, MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, call, patch
 from uuid import UUID
 
 import pytest
@@ -12,6 +12,7 @@ from bleak import BleakClient, BleakGATTCharacteristic
 from bleak.backends.device import BLEDevice
 
 from smpclient.requests.os_management import EchoWrite
+from smpclient.transport import SMPTransportDisconnected
 from smpclient.transport.ble import (
     MAC_ADDRESS_PATTERN,
     SMP_CHARACTERISTIC_UUID,
@@ -35,7 +36,7 @@ class MockBleakClient:
 def test_constructor() -> None:
     t = SMPBLETransport()
     assert t._buffer == bytearray()
-    assert isinstance(t._notify_condition, asyncio.Condition)
+    assert t._receive_waiter is None
 
 
 def test_MAC_ADDRESS_PATTERN() -> None:
@@ -144,6 +145,27 @@ async def test_connect(
     t._client.start_notify.assert_called_once_with(SMP_CHARACTERISTIC_UUID, t._notify_callback)
 
 
+@patch("smpclient.transport.ble.BleakScanner")
+@pytest.mark.asyncio
+async def test_scan(mock_scanner: MagicMock) -> None:
+    smp_server = MagicMock(spec=BLEDevice)
+    other = MagicMock(spec=BLEDevice)
+    mock_scanner.return_value.discover = AsyncMock(
+        return_value={
+            "a": (smp_server, MagicMock(service_uuids=[str(SMP_SERVICE_UUID).upper()])),
+            "b": (other, MagicMock(service_uuids=["0000180f-0000-1000-8000-00805f9b34fb"])),
+        }
+    )
+
+    assert await SMPBLETransport.scan(timeout=1) == [smp_server]
+    mock_scanner.assert_called_once_with(service_uuids=[str(SMP_SERVICE_UUID)])
+
+    mock_scanner.reset_mock()
+    assert await SMPBLETransport.scan(timeout=1, passive=True) == [smp_server]
+    assert mock_scanner.call_args.kwargs["scanning_mode"] == "passive"
+    assert mock_scanner.call_args.kwargs["bluez"]["or_patterns"][0][2] == SMP_SERVICE_UUID.bytes_le
+
+
 @pytest.mark.asyncio
 async def test_disconnect() -> None:
     t = SMPBLETransport()
@@ -163,6 +185,16 @@ async def test_send() -> None:
         t._smp_characteristic, b"Hello pytest!", response=False
     )
 
+    # fragmented by the MTU
+    t._client.write_gatt_char.reset_mock()
+    t._max_write_without_response_size = 5
+    await t.send(b"Hello pytest!")
+    assert t._client.write_gatt_char.await_args_list == [
+        call(t._smp_characteristic, b"Hello", response=False),
+        call(t._smp_characteristic, b" pyte", response=False),
+        call(t._smp_characteristic, b"st!", response=False),
+    ]
+
 
 @pytest.mark.asyncio
 async def test_receive() -> None:
@@ -194,6 +226,59 @@ async def test_receive() -> None:
 
     assert b == REP
 
+    # and with two pipelined responses in a single notify
+    REP2 = EchoWrite._Response.get_default()(sequence=1, r="Hello again!").BYTES  # type: ignore
+
+    b, _ = await asyncio.gather(
+        t.receive(),
+        t._notify_callback(t._smp_characteristic, REP + REP2),
+    )
+
+    assert b == REP
+    assert await t.receive() == REP2
+    assert t._buffer == bytearray()
+
+
+@pytest.mark.asyncio
+async def test_receive_disconnected() -> None:
+    t = SMPBLETransport()
+    t._client = MagicMock(spec=BleakClient)
+    t._disconnected_event.clear()  # pretend t.connect() was successful
+
+    task = asyncio.create_task(t.receive())
+    await asyncio.sleep(0.001)
+    assert t._receive_waiter is not None
+
+    t._set_disconnected_event(t._client)
+    with pytest.raises(SMPTransportDisconnected):
+        await task
+    assert t._receive_waiter is None
+
+    # and without waiting once already disconnected
+    with pytest.raises(SMPTransportDisconnected):
+        await t.receive()
+
+
+@pytest.mark.asyncio
+async def test_notify_callback_wakes_receive_once_per_message() -> None:
+    t = SMPBLETransport()
+    t._smp_characteristic = MagicMock(spec=BleakGATTCharacteristic)
+    t._smp_characteristic.uuid = str(SMP_CHARACTERISTIC_UUID)
+
+    REP = EchoWrite._Response.get_default()(sequence=0, r="Hello pytest!").BYTES  # type: ignore
+
+    with patch.object(t, "_wake_receive") as notify:
+        await t._notify_callback(t._smp_characteristic, REP[:4])
+        assert t._message_length is None
+        await t._notify_callback(t._smp_characteristic, REP[4:10])
+        assert t._message_length == len(REP)
+        notify.assert_not_called()
+        await t._notify_callback(t._smp_characteristic, REP[10:])
+        notify.assert_called_once_with()
+
+    assert await t.receive() == REP
+    assert t._message_length is None
+
 
 @pytest.mark.asyncio
 async def test_send_and_receive() -> None:
@@ -217,3 +302,14 @@ def test_max_unencoded_size_mcumgr_param() -> None:
     t._client = MagicMock(spec=BleakClient)
     t._smp_server_transport_buffer_size = 9001
     assert t.max_unencoded_size == 9001
+
+
+def test_max_unencoded_size_initialize() -> None:
+    t = SMPBLETransport()
+    t._client = MagicMock(spec=BleakClient)
+    t._max_write_without_response_size = 42
+    assert t.max_unencoded_size == 42
+
+    # the cached value is recomputed once the server's buffer size is known
+    t.initialize(9001)
+    assert t.max_unencoded_size == 9001
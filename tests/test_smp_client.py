@@ -5,8 +5,8 @@ from __future__ import annotations
 import sys
 from hashlib import sha256
 from pathlib import Path
-from typing import List
-from unittest.mock import AsyncMock, PropertyMock, call, patch
+from typing import Callable, List
+from unittest.mock import AsyncMock, MagicMock, PropertyMock, call, patch
 
 import pytest
 from smp import header as smphdr
@@ -39,7 +39,7 @@ from smpclient.exceptions import SMPBadSequence, SMPUploadError
 from smpclient.generics import error, error_v1, error_v2, success
 from smpclient.requests.file_management import FileDownload, FileUpload
 from smpclient.requests.image_management import ImageUploadWrite
-from smpclient.requests.os_management import ResetWrite
+from smpclient.requests.os_management import MCUMgrParametersRead, ResetWrite
 from smpclient.transport.serial import SMPSerialTransport
 
 if sys.version_info < (3, 10):
@@ -317,6 +317,270 @@ async def test_upload_hello_world_bin(
     assert accumulated_image == image
 
 
+@pytest.mark.asyncio
+@pytest.mark.parametrize("max_requests_in_flight", [1, 2, 4])
+@pytest.mark.parametrize("set_by_transport", [False, True])
+async def test_upload_pipelined(max_requests_in_flight: int, set_by_transport: bool) -> None:
+    with open(
+        str(Path("tests", "fixtures", "zephyr-v3.5.0-2795-g28ff83515d", "hello_world.signed.bin")),
+        "rb",
+    ) as f:
+        image = f.read()
+
+    m = SMPMockTransport()
+    type(m).mtu = PropertyMock(return_value=512)
+    type(m).max_unencoded_size = PropertyMock(return_value=512)
+    s = SMPClient(m, "address")
+    if set_by_transport:
+        s._smp_server_transport_buffer_count = 8
+        m.max_requests_in_flight = max_requests_in_flight  # type: ignore[attr-defined]
+    else:
+        s._smp_server_transport_buffer_count = max_requests_in_flight
+
+    accumulated_image = bytearray([])
+    responses: List[bytes] = []
+    max_pending = 0
+
+    async def mock_request(
+        request: ImageUploadWrite, timeout_s: float = 120.000
+    ) -> ImageUploadWriteResponse:
+        accumulated_image.extend(request.data)
+        return ImageUploadWrite._Response.get_default()(off=request.off + len(request.data))  # type: ignore # noqa
+
+    async def mock_send(data: bytes) -> None:
+        nonlocal max_pending
+        request = ImageUploadWrite.loads(data)
+        assert request.off == len(accumulated_image)
+        accumulated_image.extend(request.data)
+        responses.append(
+            ImageUploadWrite._Response.get_default()(  # type: ignore
+                sequence=request.header.sequence, off=request.off + len(request.data)
+            ).BYTES
+        )
+        max_pending = max(max_pending, len(responses))
+
+    async def mock_receive() -> bytes:
+        return responses.pop(0)
+
+    s.request = mock_request  # type: ignore
+    m.send = mock_send  # type: ignore
+    m.receive = mock_receive  # type: ignore
+
+    offsets = [off async for off in s.upload(image, pipeline=True)]
+
+    assert accumulated_image == image
+    assert offsets[-1] == len(image)
+    assert max_pending == (max_requests_in_flight if max_requests_in_flight > 1 else 0)
+
+
+def _mock_pipelined_image_server(
+    m: SMPMockTransport,
+    image: bytes,
+    respond: Callable[[ImageUploadWrite, int], ImageUploadWriteResponse | None] | None = None,
+) -> bytearray:
+    """Mock an SMP server that writes the `image` chunks that it receives in order.
+
+    `respond` may return the response to a request, given the offset that the
+    server has written, to override the default response.  Returns the image
+    that the server has written.
+    """
+
+    written = bytearray([])
+    responses: List[bytes] = []
+
+    async def mock_send(data: bytes) -> None:
+        request = ImageUploadWrite.loads(data)
+        response = None if respond is None else respond(request, len(written))
+        if response is None:
+            if request.off == len(written):
+                written.extend(request.data)
+            response = ImageUploadWrite._Response.get_default()(  # type: ignore
+                sequence=request.header.sequence, off=len(written)
+            )
+        responses.append(response.BYTES)
+
+    async def mock_receive() -> bytes:
+        return responses.pop(0)
+
+    m.send = mock_send  # type: ignore
+    m.receive = mock_receive  # type: ignore
+
+    return written
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("max_requests_in_flight", [2, 4])
+@pytest.mark.parametrize("rejected", ["middle", "last"])
+async def test_upload_pipelined_rejected_chunk(
+    max_requests_in_flight: int, rejected: str, caplog: pytest.LogCaptureFixture
+) -> None:
+    image = bytes([i % 255 for i in range(5120)])
+
+    m = SMPMockTransport()
+    type(m).mtu = PropertyMock(return_value=512)
+    type(m).max_unencoded_size = PropertyMock(return_value=512)
+    s = SMPClient(m, "address")
+    s._smp_server_transport_buffer_count = max_requests_in_flight
+
+    rejections: List[int] = []
+
+    def respond(request: ImageUploadWrite, off: int) -> ImageUploadWriteResponse | None:
+        """Reject the chosen chunk once, as if the flash write failed."""
+        end = request.off + len(request.data)
+        chosen = end == len(image) if rejected == "last" else request.off >= len(image) // 2
+        if chosen and request.off == off and len(rejections) == 0:
+            rejections.append(request.off)
+            return ImageUploadWrite._Response.get_default()(  # type: ignore
+                sequence=request.header.sequence, off=off
+            )
+        return None
+
+    written = _mock_pipelined_image_server(m, image, respond)
+
+    offsets = [off async for off in s.upload(image, pipeline=True)]
+
+    assert len(rejections) == 1
+    assert written == image
+    assert offsets[-1] == len(image)
+    assert rejections[0] in offsets  # the server's offset was reported and resumed from
+    assert any("Expected offset" in r.message for r in caplog.records)
+
+
+@pytest.mark.asyncio
+async def test_upload_pipelined_checks_the_last_response() -> None:
+    image = bytes([i % 255 for i in range(5120)])
+
+    m = SMPMockTransport()
+    type(m).mtu = PropertyMock(return_value=512)
+    type(m).max_unencoded_size = PropertyMock(return_value=512)
+    s = SMPClient(m, "address")
+    s._smp_server_transport_buffer_count = 4
+
+    def respond(request: ImageUploadWrite, off: int) -> ImageUploadWriteResponse | None:
+        """Skip to the end of the image, then report a SHA256 mismatch."""
+        if request.off == 0:
+            return None
+        return ImageUploadWrite._Response.get_default()(  # type: ignore
+            sequence=request.header.sequence,
+            off=len(image),
+            match=None if request.off == off else False,
+        )
+
+    _mock_pipelined_image_server(m, image, respond)
+
+    with pytest.raises(SMPUploadError, match="mismatched SHA256"):
+        _ = [off async for off in s.upload(image, pipeline=True)]
+
+
+def _flash_write_failed(request: ImageUploadWrite) -> ImageManagementErrorV2:
+    """Return the error that the SMP server sends when it fails to write a chunk."""
+
+    h = request.header
+    return ImageManagementErrorV2(
+        header=smphdr.Header(
+            op=h.op,
+            version=h.version,
+            flags=h.flags,
+            length=17,
+            group_id=h.group_id,
+            sequence=h.sequence,
+            command_id=h.command_id,
+        ),
+        err=SMPErr(  # type: ignore
+            rc=IMG_MGMT_ERR.FLASH_WRITE_FAILED, group=smphdr.GroupId.IMAGE_MANAGEMENT
+        ).model_dump(),
+    )
+
+
+@pytest.mark.asyncio
+async def test_upload_pipelined_error() -> None:
+    image = bytes([i % 255 for i in range(5120)])
+
+    m = SMPMockTransport()
+    type(m).mtu = PropertyMock(return_value=512)
+    type(m).max_unencoded_size = PropertyMock(return_value=512)
+    s = SMPClient(m, "address")
+    s._smp_server_transport_buffer_count = 4
+
+    def respond(request: ImageUploadWrite, off: int) -> ImageManagementErrorV2 | None:
+        """Fail the flash write of a chunk in the middle of the image."""
+        if request.off < len(image) // 2:
+            return None
+        return _flash_write_failed(request)
+
+    _mock_pipelined_image_server(m, image, respond)  # type: ignore
+
+    offsets: List[int] = []
+    with pytest.raises(SMPUploadError) as e:
+        async for off in s.upload(image, pipeline=True):
+            offsets.append(off)
+    assert e.value.args[0].err.rc == IMG_MGMT_ERR.FLASH_WRITE_FAILED
+    assert 0 < offsets[-1] < len(image)
+
+
+@pytest.mark.asyncio
+async def test_upload_pipelined_error_discards_requests_in_flight() -> None:
+    image = bytes([i % 255 for i in range(5120)])
+
+    m = SMPMockTransport()
+    type(m).mtu = PropertyMock(return_value=512)
+    type(m).max_unencoded_size = PropertyMock(return_value=512)
+    s = SMPClient(m, "address")
+    s._smp_server_transport_buffer_count = 4
+
+    failures: List[int] = []
+
+    def respond(request: ImageUploadWrite, off: int) -> ImageManagementErrorV2 | None:
+        """Fail the flash write of a chunk in the middle of the image once."""
+        if request.off < len(image) // 2 or len(failures) > 0:
+            return None
+        failures.append(request.off)
+        return _flash_write_failed(request)
+
+    written = _mock_pipelined_image_server(m, image, respond)  # type: ignore
+
+    with pytest.raises(SMPUploadError):
+        _ = [off async for off in s.upload(image, pipeline=True)]
+
+    # the retry receives the responses to its own requests, not stale ones
+    offsets = [off async for off in s.upload(image, pipeline=True)]
+
+    assert len(failures) == 1
+    assert written == image
+    assert offsets[-1] == len(image)
+
+
+@pytest.mark.asyncio
+async def test_initialize() -> None:
+    t = SMPSerialTransport()
+    s = SMPClient(t, "address")
+    s.request = AsyncMock(  # type: ignore
+        return_value=MCUMgrParametersRead._Response.get_default()(  # type: ignore
+            buf_size=2048, buf_count=4
+        )
+    )
+
+    await s._initialize()
+
+    assert t._smp_server_transport_buffer_size == 2048
+    assert s._smp_server_transport_buffer_count == 4
+
+    # a transport that implements the single argument initialize() still works
+    m = SMPMockTransport()
+    m.initialize = MagicMock(spec=lambda smp_server_transport_buffer_size: None)  # type: ignore
+    s = SMPClient(m, "address")
+    s.request = AsyncMock(  # type: ignore
+        return_value=MCUMgrParametersRead._Response.get_default()(  # type: ignore
+            buf_size=2048, buf_count=4
+        )
+    )
+
+    await s._initialize()
+
+    m.initialize.assert_called_once_with(2048)
+    assert s._smp_server_transport_buffer_count == 4
+
+
 @pytest.mark.asyncio
 @pytest.mark.parametrize("max_smp_encoded_frame_size", [128, 256, 512, 1024, 2048, 4096, 8192])
 @pytest.mark.parametrize("line_buffers", [1, 2, 3, 4, 8])
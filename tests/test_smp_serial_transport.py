@@ -2,16 +2,25 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
+import os
+import sys
 from unittest.mock import AsyncMock, MagicMock, PropertyMock, patch
 
 import pytest
-from serial import Serial
+from serial import Serial, SerialException
 from smp import packet as smppacket
 
 from smpclient.requests.os_management import EchoWrite
+from smpclient.transport import SMPTransportDisconnected
 from smpclient.transport.serial import SMPSerialTransport
 
+try:
+    from asyncio import timeout  # type: ignore
+except ImportError:  # backport for Python3.10 and below
+    from async_timeout import timeout  # type: ignore
+
 
 def test_constructor() -> None:
     t = SMPSerialTransport()
@@ -71,6 +80,40 @@ async def test_send() -> None:
     t._conn.write.assert_called_once()
     assert p.call_count == 2  # called twice since out buffer was not drained on first call
 
+    # a frame that spans several packets is written at once
+    t = SMPSerialTransport(line_length=8)
+    t._conn.write = MagicMock()  # type: ignore
+    type(t._conn).out_waiting = PropertyMock(return_value=0)  # type: ignore
+
+    await t.send(r.BYTES)
+    t._conn.write.assert_called_once_with(b"".join(smppacket.encode(r.BYTES, line_length=8)))
+
+
+@pytest.mark.asyncio
+async def test_send_cancelled_while_draining() -> None:
+    t = SMPSerialTransport()
+    t._conn.write = MagicMock()  # type: ignore
+
+    # e.g. the peer never asserts CTS, so the output buffer never drains
+    with patch.object(Serial, "out_waiting", new_callable=PropertyMock, return_value=1):
+        with pytest.raises(asyncio.TimeoutError):
+            async with timeout(0.050):
+                await t.send(EchoWrite(d="Hello pytest!").BYTES)
+
+
+@pytest.mark.asyncio
+async def test_disconnected() -> None:
+    t = SMPSerialTransport()
+    t._conn.write = MagicMock(side_effect=SerialException("write failed"))  # type: ignore
+    with pytest.raises(SMPTransportDisconnected) as e:
+        await t.send(EchoWrite(d="Hello pytest!").BYTES)
+    assert isinstance(e.value.__cause__, SerialException)
+
+    t._readuntil = AsyncMock(side_effect=SerialException("read failed"))  # type: ignore
+    with pytest.raises(SMPTransportDisconnected) as e:
+        await t.receive()
+    assert isinstance(e.value.__cause__, SerialException)
+
 
 @pytest.mark.asyncio
 async def test_receive() -> None:
@@ -100,6 +143,7 @@ async def test_readuntil() -> None:
     p2 = [p for p in smppacket.encode(m2.BYTES, 8)]
     packets = p1 + p2
     t._conn.read_all = MagicMock(side_effect=packets)  # type: ignore
+    t._wait_for_data = AsyncMock()  # type: ignore
 
     for p in packets:
         assert p == await t._readuntil()
@@ -151,6 +195,7 @@ async def test_readuntil_with_smp_server_logging(caplog: pytest.LogCaptureFixtur
     )
 
     t._conn.port = "/dev/ttyUSB0"
+    t._wait_for_data = AsyncMock()  # type: ignore
 
     with caplog.at_level(logging.WARNING):
         for p in packets:
@@ -164,6 +209,25 @@ async def test_readuntil_with_smp_server_logging(caplog: pytest.LogCaptureFixtur
         assert "/dev/ttyUSB0: Thought \n I'd just say hi!\n\x00\x01\x02\x03Bye!\n" in messages
 
 
+@pytest.mark.asyncio
+async def test_readuntil_skips_decoding_when_not_logged(caplog: pytest.LogCaptureFixture) -> None:
+    t = SMPSerialTransport()
+    m = EchoWrite._Response.get_default()(sequence=0, r="Hello pytest!")  # type: ignore
+    packets = [p for p in smppacket.encode(m.BYTES, 8)]
+
+    t._conn.read_all = MagicMock(  # type: ignore
+        side_effect=[b"Another line\nAgain \n", b"before SMP"] + packets
+    )
+    t._wait_for_data = AsyncMock()  # type: ignore
+    t._log_device_output = MagicMock()  # type: ignore
+
+    with caplog.at_level(logging.ERROR, logger="smpclient.transport.serial"):
+        for p in packets:
+            assert p == await t._readuntil()
+
+    t._log_device_output.assert_not_called()
+
+
 @pytest.mark.asyncio
 async def test_send_and_receive() -> None:
     t = SMPSerialTransport()
@@ -174,3 +238,23 @@ async def test_send_and_receive() -> None:
 
     t.send.assert_awaited_once_with(b"some data")
     t.receive.assert_awaited_once_with()
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="Windows serial ports are polled")
+@pytest.mark.asyncio
+async def test_wait_for_data() -> None:
+    t = SMPSerialTransport()
+    r, w = os.pipe()
+    t._conn.fileno = MagicMock(return_value=r)  # type: ignore
+
+    try:
+        task = asyncio.create_task(t._wait_for_data())
+        await asyncio.sleep(0.010)
+        assert not task.done()
+
+        os.write(w, b"hello")
+        async with timeout(0.050):
+            await task
+    finally:
+        os.close(r)
+        os.close(w)
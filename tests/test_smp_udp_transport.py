@@ -1,6 +1,5 @@
 """Tests for `SMPUDPTransport`."""
 
-import asyncio
 from typing import Final, cast
 from unittest.mock import AsyncMock, MagicMock, call, patch
 
@@ -36,21 +35,10 @@ async def test_connect(_: MagicMock) -> None:
 async def test_disconnect(_: MagicMock) -> None:
     t = SMPUDPTransport()
     t._client = cast(MagicMock, t._client)  # type: ignore
-    t._client._protocol = MagicMock()
 
-    # no errors in error queue
-    t._client._protocol.error_queue.empty.return_value = True
     await t.disconnect()
     t._client.disconnect.assert_called_once()
 
-    # errors in error queue
-    t._client._protocol.error_queue = asyncio.Queue()
-    t._client._protocol.error_queue.put_nowait(Exception("beep"))
-    t._client._protocol.error_queue.put_nowait(Exception("boop"))
-    assert t._client._protocol.error_queue.empty() is False
-    await t.disconnect()
-    assert t._client._protocol.error_queue.empty() is True
-
 
 @patch("smpclient.transport.udp.UDPClient", autospec=True)
 @pytest.mark.asyncio
@@ -70,6 +58,8 @@ async def test_send(_: MagicMock) -> None:
     t._client.send.assert_has_calls(
         (call(big_message[: t.max_unencoded_size]), call(big_message[t.max_unencoded_size :]))
     )
+    # the fragments are views of the message, not copies
+    assert all(isinstance(c.args[0], memoryview) for c in t._client.send.call_args_list)
 
 
 @patch("smpclient.transport.udp.UDPClient", autospec=True)
@@ -82,7 +72,7 @@ async def test_receive(_: MagicMock) -> None:
 
     # no fragmentation
     t._client.receive.return_value = message
-    assert await t.receive() == message
+    assert await t.receive() is message  # not copied
 
     # fragmentation
     t._client.receive.side_effect = (message[:10], message[10:11], message[11:12], message[12:])
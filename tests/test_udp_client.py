@@ -8,6 +8,7 @@ import pytest
 import pytest_asyncio
 from typing_extensions import AsyncGenerator
 
+from smpclient.transport import SMPTransportDisconnected
 from smpclient.transport._udp_client import Addr, UDPClient, _UDPProtocol
 
 try:
@@ -20,14 +21,15 @@ def test_UDPClient_init() -> None:
     UDPClient()
 
 
-def test_UDPProtocol_init() -> None:
-    p = _UDPProtocol()
+@pytest.mark.asyncio
+async def test_UDPProtocol_init() -> None:
+    loop = asyncio.get_running_loop()
+    p = _UDPProtocol(loop)
 
-    assert p._receive_queue is p.receive_queue
-    assert p.receive_queue.empty()
+    assert p._loop is loop
 
-    assert p._error_queue is p.error_queue
-    assert p.error_queue.empty()
+    assert len(p._receive_buffer) == 0
+    assert p._receive_waiter is None
 
 
 @patch("smpclient.transport._udp_client._UDPProtocol", autospec=True)
@@ -38,7 +40,9 @@ async def test_UDPClient_connect(_: MagicMock) -> None:
     await c.connect(Addr("127.0.0.1", 1337))
     assert isinstance(c._transport, asyncio.BaseTransport)
     assert isinstance(c._protocol, _UDPProtocol)
-    assert isinstance(c._protocol.receive_queue, MagicMock)
+    assert c._loop is asyncio.get_running_loop()
+    assert c._sendto == c._transport.sendto
+    assert c._close == c._transport.close
     c._protocol = cast(MagicMock, c._protocol)
     c._protocol.connection_made.assert_called_once_with(c._transport)
 
@@ -46,9 +50,9 @@ async def test_UDPClient_connect(_: MagicMock) -> None:
 def test_UDPClient_send() -> None:
     c = UDPClient()
 
-    c._transport = MagicMock()
+    c._sendto = MagicMock()
     c.send(b"hello")
-    c._transport.sendto.assert_called_once_with(b"hello")
+    c._sendto.assert_called_once_with(b"hello")
 
 
 @pytest.mark.asyncio
@@ -56,9 +60,35 @@ async def test_UDPClient_receive() -> None:
     c = UDPClient()
 
     c._protocol = MagicMock()
-    c._protocol.receive_queue.get = AsyncMock()
+    c._protocol.receive = AsyncMock()
     await c.receive()
-    c._protocol.receive_queue.get.assert_awaited_once()
+    c._protocol.receive.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_UDPProtocol_receive() -> None:
+    p = _UDPProtocol(asyncio.get_running_loop())
+
+    # datagrams received before receive() are buffered in order
+    p.datagram_received(b"hello", ("127.0.0.1", 1337))
+    p.datagram_received(b"world", ("127.0.0.1", 1337))
+    assert await p.receive() == b"hello"
+    assert await p.receive() == b"world"
+
+    # receive() waits for the next datagram
+    task = asyncio.create_task(p.receive())
+    await asyncio.sleep(0.001)
+    assert p._receive_waiter is not None
+    p.datagram_received(b"later", ("127.0.0.1", 1337))
+    async with timeout(0.050):
+        assert await task == b"later"
+    assert p._receive_waiter is None
+
+    # a cancelled receive() doesn't leave a waiter behind
+    with pytest.raises(asyncio.TimeoutError):
+        async with timeout(0.001):
+            await p.receive()
+    assert p._receive_waiter is None
 
 
 @patch("smpclient.transport._udp_client._UDPProtocol", autospec=True)
@@ -66,9 +96,9 @@ async def test_UDPClient_receive() -> None:
 async def test_UDPClient_disconnect(_: MagicMock) -> None:
     c = UDPClient()
 
-    c._transport = MagicMock()
+    c._close = MagicMock()
     c.disconnect()
-    c._transport.close.assert_called_once_with()
+    c._close.assert_called_once_with()
 
     c = UDPClient()
     await c.connect(Addr("127.0.0.1", 1337))
@@ -136,9 +166,12 @@ async def test_error_received() -> None:
     class MockError(OSError):
         ...
 
+    c._protocol.datagram_received(b"hello", ("127.0.0.1", 1337))
     c._protocol.error_received(MockError())
     async with timeout(0.050):
-        assert isinstance(await c._protocol.error_queue.get(), MockError)
+        assert await c.receive() == b"hello"
+        with pytest.raises(MockError):
+            await c.receive()
 
 
 @pytest.mark.filterwarnings("ignore::pytest.PytestUnraisableExceptionWarning")
@@ -147,9 +180,13 @@ async def test_connection_lost_no_exception() -> None:
     c = UDPClient()
     await c.connect(Addr("127.0.0.1", 1337))
 
-    c._protocol.connection_lost(None)
+    task = asyncio.create_task(c.receive())
     await asyncio.sleep(0.001)
-    assert c._protocol.error_queue.empty()
+    c._protocol.connection_lost(None)
+    async with timeout(0.050):
+        with pytest.raises(SMPTransportDisconnected) as e:
+            await task
+    assert e.value.__cause__ is None
 
 
 @pytest.mark.filterwarnings("ignore::pytest.PytestUnraisableExceptionWarning")
@@ -163,4 +200,7 @@ async def test_connection_lost() -> None:
 
     c._protocol.connection_lost(MockError())
     async with timeout(0.050):
-        assert isinstance(await c._protocol.error_queue.get(), MockError)
+        with pytest.raises(SMPTransportDisconnected) as e:
+            await c.receive()
+    assert isinstance(e.value.__cause__, MockError)
+    assert isinstance(e.value, ConnectionError)